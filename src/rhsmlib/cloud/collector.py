@@ -0,0 +1,369 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Base class for collecting metadata and signature from cloud provider
+metadata servers (IMDS). Collected metadata are cached to files to not
+do HTTP requests to metadata server with every invocation of
+subscription-manager.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from rhsm.https import httplib
+
+log = logging.getLogger(__name__)
+
+
+class CloudCollector(object):
+    """
+    Base class used for collecting metadata and signature of one
+    concrete cloud provider
+    """
+
+    # Instances carry only this fixed set of attributes
+    __slots__ = (
+        '_parsed_metadata',
+        '_parsed_metadata_ctime',
+        '_cached_metadata',
+        '_cached_metadata_ctime',
+        '_cached_signature',
+        '_cached_signature_ctime',
+        '_local'
+    )
+
+    # Unique ID of cloud provider (e.g. "aws", "azure", "gcp", ...)
+    CLOUD_PROVIDER_ID = None
+
+    # Hostname or IP address of metadata server (IMDS)
+    CLOUD_PROVIDER_HOST = None
+
+    # Path of document with metadata on the metadata server
+    CLOUD_PROVIDER_METADATA_PATH = None
+
+    # Type of metadata document (e.g. "application/json")
+    CLOUD_PROVIDER_METADATA_TYPE = None
+
+    # Path of document with signature of metadata on the metadata server
+    CLOUD_PROVIDER_SIGNATURE_PATH = None
+
+    # Type of signature document (e.g. "text/plain")
+    CLOUD_PROVIDER_SIGNATURE_TYPE = None
+
+    # Timeout of requests to the metadata server (seconds). The server
+    # is link-local; when it does not answer quickly, then the system
+    # very likely does not run on given cloud and waiting for the
+    # default TCP timeout would stall subscription-manager startup.
+    CLOUD_PROVIDER_TIMEOUT = 1.0
+
+    # Path to file, where metadata are cached (set to None to disable caching)
+    METADATA_CACHE_FILE = None
+
+    # Time to live of cached metadata (seconds)
+    METADATA_CACHE_TTL = 3600
+
+    # Path to file, where signature of metadata is cached
+    SIGNATURE_CACHE_FILE = None
+
+    # Time to live of cached signature (seconds)
+    SIGNATURE_CACHE_TTL = 3600
+
+    def __init__(self):
+        """
+        Initialize cloud collector
+        """
+        self._parsed_metadata = None
+        self._parsed_metadata_ctime = None
+        # Raw documents are memoized, so repeated calls within one
+        # process do not re-check the cache file or ask the server
+        # again. The memos expire together with the cache file TTLs,
+        # so a long-lived process refreshes the documents too.
+        self._cached_metadata = None
+        self._cached_metadata_ctime = None
+        self._cached_signature = None
+        self._cached_signature_ctime = None
+        # HTTP connections to the metadata server are kept open and
+        # reused (keep-alive), because token, metadata and signature
+        # requests go to the same host and opening a new TCP connection
+        # for every request would pay one more round-trip per request.
+        # Connections are thread-local, because documents can be
+        # requested concurrently and one connection cannot serve
+        # more requests at once.
+        self._local = threading.local()
+
+    def _get_data_from_server(self, path, headers=None, method='GET'):
+        """
+        Try to get one document from metadata server (IMDS)
+        :param path: path of requested document on the metadata server
+        :param headers: dictionary with additional HTTP headers
+        :param method: HTTP method used for the request
+        :return: String with body of HTTP response, when request was successful;
+            otherwise return None
+        """
+        if headers is None:
+            headers = {}
+        try:
+            conn = self._get_http_connection()
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+            # The body has to be read even for error responses;
+            # otherwise the connection could not be reused
+            output = response.read()
+        except (httplib.HTTPException, socket.error) as err:
+            log.debug("Unable to get %s from cloud provider %s: %s",
+                      path, self.CLOUD_PROVIDER_ID, err)
+            self._close_http_connection()
+            return None
+        if response.status != 200:
+            log.debug("Unable to get %s from cloud provider %s: %s",
+                      path, self.CLOUD_PROVIDER_ID, response.status)
+            return None
+        if isinstance(output, bytes):
+            output = output.decode('utf-8')
+        return output
+
+    def _get_http_connection(self):
+        """
+        Get keep-alive HTTP connection to the metadata server for
+        the current thread. New connection is created only, when the
+        current thread does not have any usable connection yet.
+        :return: instance of httplib.HTTPConnection
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = httplib.HTTPConnection(
+                self.CLOUD_PROVIDER_HOST,
+                timeout=self.CLOUD_PROVIDER_TIMEOUT
+            )
+            self._local.connection = conn
+        return conn
+
+    def _close_http_connection(self):
+        """
+        Close and drop HTTP connection of the current thread (e.g.
+        after connection error), so that next request opens new one
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+
+    def _get_cache_file_content(self, cache_file, ttl):
+        """
+        Try to get content of cache file, when the cache file exists
+        and it is still valid (it is not older than given time to live)
+        :param cache_file: path to the cache file
+        :param ttl: time to live of the cache file (seconds)
+        :return: String with content of cache file, when cache file is valid;
+            otherwise return None
+        """
+        if cache_file is None:
+            return None
+        try:
+            fd = os.open(cache_file, os.O_RDONLY)
+        except OSError:
+            log.debug("Cache file %s does not exist", cache_file)
+            return None
+        try:
+            # One fstat() gives us mtime for the TTL check and size for
+            # reading whole content of the small cache file using only
+            # one read() syscall (content cannot grow under our hands as
+            # it is written atomically using rename)
+            file_stat = os.fstat(fd)
+            if file_stat.st_mtime + ttl <= time.time():
+                log.debug("Cache file %s timed out", cache_file)
+                return None
+            content = os.read(fd, file_stat.st_size)
+        except OSError as err:
+            log.debug("Unable to read cache file %s: %s", cache_file, err)
+            return None
+        finally:
+            os.close(fd)
+        return content.decode('utf-8')
+
+    def _write_cache_file(self, cache_file, content):
+        """
+        Try to write content to cache file. Temporary file and atomic
+        rename are used to not leave partially written cache file
+        behind, when writing is interrupted.
+        :param cache_file: path to the cache file
+        :param content: string with content to be written
+        """
+        if cache_file is None:
+            return
+        cache_dir = os.path.dirname(cache_file)
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, 0o700)
+            tmp_file = cache_file + '.tmp'
+            # Restrictive mode is set atomically at creation (cached
+            # documents can contain e.g. IMDSv2 session token), so no
+            # extra chmod() syscall is needed
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, content.encode('utf-8'))
+            finally:
+                os.close(fd)
+            os.rename(tmp_file, cache_file)
+        except (IOError, OSError) as err:
+            log.debug("Unable to write cache file %s: %s", cache_file, err)
+        else:
+            log.debug("Cache file %s was written", cache_file)
+
+    def _get_metadata_from_cache(self):
+        """
+        Try to get metadata from cache file
+        :return: String with metadata, when valid cache file exists;
+            otherwise return None
+        """
+        return self._get_cache_file_content(self.METADATA_CACHE_FILE, self.METADATA_CACHE_TTL)
+
+    def _get_metadata_from_server(self):
+        """
+        Try to get metadata from metadata server (IMDS) and cache
+        successful response to cache file
+        :return: String with metadata, when it was possible to get them;
+            otherwise return None
+        """
+        metadata = self._get_data_from_server(self.CLOUD_PROVIDER_METADATA_PATH)
+        if metadata is not None:
+            self._write_cache_file(self.METADATA_CACHE_FILE, metadata)
+        return metadata
+
+    def _get_signature_from_cache_file(self):
+        """
+        Try to get signature of metadata from cache file
+        :return: String with signature, when valid cache file exists;
+            otherwise return None
+        """
+        return self._get_cache_file_content(self.SIGNATURE_CACHE_FILE, self.SIGNATURE_CACHE_TTL)
+
+    def _get_signature_from_server(self):
+        """
+        Try to get signature of metadata from metadata server (IMDS)
+        and cache successful response to cache file
+        :return: String with signature, when it was possible to get it;
+            otherwise return None
+        """
+        signature = self._get_data_from_server(self.CLOUD_PROVIDER_SIGNATURE_PATH)
+        if signature is not None:
+            self._write_cache_file(self.SIGNATURE_CACHE_FILE, signature)
+        return signature
+
+    def _get_memoized_metadata(self):
+        """
+        Try to get metadata memoized in memory, when the memo did not
+        time out yet
+        :return: String with metadata, when valid memo exists;
+            otherwise return None
+        """
+        if self._cached_metadata is not None:
+            if self._cached_metadata_ctime + self.METADATA_CACHE_TTL > time.time():
+                return self._cached_metadata
+        return None
+
+    def _get_memoized_signature(self):
+        """
+        Try to get signature of metadata memoized in memory, when the
+        memo did not time out yet
+        :return: String with signature, when valid memo exists;
+            otherwise return None
+        """
+        if self._cached_signature is not None:
+            if self._cached_signature_ctime + self.SIGNATURE_CACHE_TTL > time.time():
+                return self._cached_signature
+        return None
+
+    def _memoize_metadata(self, metadata):
+        """
+        Memoize given metadata in memory together with current time
+        """
+        self._cached_metadata = metadata
+        self._cached_metadata_ctime = time.time()
+
+    def _memoize_signature(self, signature):
+        """
+        Memoize given signature in memory together with current time
+        """
+        self._cached_signature = signature
+        self._cached_signature_ctime = time.time()
+
+    def get_metadata(self):
+        """
+        Try to get metadata of cloud instance (from memory, cache file
+        or metadata server)
+        :return: String with metadata, when it was possible to get them;
+            otherwise return None
+        """
+        metadata = self._get_memoized_metadata()
+        if metadata is not None:
+            return metadata
+        metadata = self._get_metadata_from_cache()
+        if metadata is None:
+            metadata = self._get_metadata_from_server()
+        if metadata is not None:
+            self._memoize_metadata(metadata)
+        return metadata
+
+    def get_metadata_dict(self):
+        """
+        Try to get metadata of cloud instance parsed to dictionary.
+        The document is parsed only once per process and the parsed
+        dictionary is memoized, because every caller would otherwise
+        run json.loads() on the same document again.
+        :return: Dictionary with metadata, when it was possible to get
+            and parse them; otherwise return None
+        """
+        now = time.time()
+        if self._parsed_metadata is not None:
+            if self._parsed_metadata_ctime + self.METADATA_CACHE_TTL > now:
+                return self._parsed_metadata
+            # Memoized metadata timed out together with the cache file
+            self._parsed_metadata = None
+            self._parsed_metadata_ctime = None
+        metadata = self.get_metadata()
+        if metadata is None:
+            return None
+        try:
+            self._parsed_metadata = json.loads(metadata)
+        except ValueError as err:
+            log.debug("Unable to parse metadata of cloud provider %s: %s",
+                      self.CLOUD_PROVIDER_ID, err)
+            return None
+        self._parsed_metadata_ctime = now
+        return self._parsed_metadata
+
+    def get_signature(self):
+        """
+        Try to get signature of metadata of cloud instance (from
+        memory, cache file or metadata server)
+        :return: String with signature, when it was possible to get it;
+            otherwise return None
+        """
+        signature = self._get_memoized_signature()
+        if signature is not None:
+            return signature
+        signature = self._get_signature_from_cache_file()
+        if signature is None:
+            signature = self._get_signature_from_server()
+        if signature is not None:
+            self._memoize_signature(signature)
+        return signature
@@ -0,0 +1,106 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Base class for detecting if the system runs on some public cloud
+(e.g. AWS, Azure, GCP, ...) using collected facts.
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class CloudDetector(object):
+    """
+    Base class used for detection of one concrete cloud provider
+    """
+
+    # Instances carry only this fixed set of attributes
+    __slots__ = ('hw_info', '_is_vm', '_hw_string_values_lower', '_found_keywords')
+
+    # Unique ID of cloud provider (e.g. "aws", "azure", "gcp", ...)
+    ID = None
+
+    def __init__(self, hw_info):
+        """
+        Initialize cloud detector with dictionary of hardware facts
+        collected by e.g. rhsmlib.facts.host_collector.HostCollector
+        """
+        self.hw_info = hw_info
+        self._is_vm = None
+        self._hw_string_values_lower = None
+        self._found_keywords = None
+
+    def is_vm(self):
+        """
+        Is the system virtual machine at all? The result is computed
+        only once and memoized, because both detector methods ask for
+        it and detectors can be called repeatedly with the same facts.
+        :return: True, when the system is virtual machine; otherwise return False
+        """
+        if self._is_vm is None:
+            self._is_vm = self.hw_info.get('virt.is_guest') is True
+        return self._is_vm
+
+    def _search_keywords(self, keywords_re):
+        """
+        Scan all string values of hardware information for keywords of
+        one cloud provider. Every value is traversed only once,
+        because the compiled pattern matches all keywords in a single
+        pass (poor man's Aho-Corasick; a real multi-pattern automaton
+        would need a new dependency for only a few keywords).
+        :param keywords_re: compiled case-insensitive pattern matching
+            all keywords of the cloud provider
+        :return: Set of found keywords (lowercase)
+        """
+        # The result is memoized, because both detector methods can be
+        # called back-to-back on the same instance and the facts do not
+        # change. One detector instance always scans with the pattern
+        # of its own provider, so the memo cannot mix keywords.
+        if self._found_keywords is not None:
+            return self._found_keywords
+        if self._hw_string_values_lower is None:
+            # Non-string values are filtered out and strings are
+            # lowercased only once per detector instance; repeated
+            # scans then reuse the normalized tuple
+            self._hw_string_values_lower = tuple(
+                hw_item.lower()
+                for hw_item in self.hw_info.values()
+                if isinstance(hw_item, str)
+            )
+        found_keywords = set()
+        for hw_item in self._hw_string_values_lower:
+            for keyword in keywords_re.findall(hw_item):
+                found_keywords.add(keyword)
+        self._found_keywords = found_keywords
+        return found_keywords
+
+    def is_running_on_cloud(self):
+        """
+        Try to detect cloud provider using strong signals in collected
+        facts (e.g. CPE in DMI BIOS information)
+        :return: True, when it is sure that system runs on the cloud; otherwise return False
+        """
+        raise NotImplementedError
+
+    def is_likely_running_on_cloud(self):
+        """
+        When it is not sure that the system runs on the cloud, then try to
+        estimate the probability of that.
+        :return: Float value representing probability (0.0 - 1.0)
+        """
+        raise NotImplementedError
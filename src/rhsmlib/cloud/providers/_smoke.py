@@ -0,0 +1,54 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Shared smoke-test driver of cloud provider modules, intended to be run
+only from the command line, e.g.:
+
+    sudo PYTHONPATH=./src python3 -m rhsmlib.cloud.providers.aws
+"""
+
+
+def run(detector_cls, collector_cls=None):
+    """
+    Run simple smoke tests of one cloud provider: collect facts, run
+    the detector on them and, when the provider was detected and it has
+    a collector, try to collect metadata and signature too
+    :param detector_cls: class of detector of the cloud provider
+    :param collector_cls: class of collector of the cloud provider
+        (can be None, when the provider has no collector yet)
+    """
+    # The facts collectors are imported lazily, because they are
+    # needed only here and they drag in the whole facts machinery
+    from rhsmlib.facts.host_collector import HostCollector
+    from rhsmlib.facts.hwprobe import HardwareCollector
+
+    host_collector = HostCollector()
+    hardware_collector = HardwareCollector()
+    host_facts = host_collector.get_all()
+    hw_facts = hardware_collector.get_all()
+    facts = {}
+    facts.update(host_facts)
+    facts.update(hw_facts)
+    cloud_detector = detector_cls(facts)
+    result = cloud_detector.is_running_on_cloud()
+    probability = cloud_detector.is_likely_running_on_cloud()
+    print('>>> debug <<< result: %s, probability: %6.3f' % (result, probability))
+    if result is True and collector_cls is not None:
+        cloud_collector = collector_cls()
+        metadata, signature = cloud_collector.collect_all()
+        print('>>> debug <<< metadata: %s' % metadata)
+        print('>>> debug <<< signature: %s' % signature)
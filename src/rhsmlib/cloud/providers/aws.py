@@ -0,0 +1,470 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Detector and collector of the AWS cloud provider. The detector tries
+to find out if the system runs on AWS public cloud. The collector tries
+to gather metadata and signature of EC2 instance from the AWS metadata
+server (IMDS). Both IMDSv1 and IMDSv2 are supported. For more details
+about IMDS see:
+
+https://docs.aws.amazon.com/AWSEC2/latest/UserGuide/ec2-instance-metadata.html
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import time
+
+# concurrent.futures exists only on Python 3 and the futures backport
+# is not required by Python 2 builds; collectors fall back to
+# sequential requests, when the executor is not available
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    ThreadPoolExecutor = None
+
+from rhsmlib.cloud.detector import CloudDetector
+from rhsmlib.cloud.collector import CloudCollector
+
+log = logging.getLogger(__name__)
+
+# Compiled only once; one case-insensitive scan per hardware item is
+# cheaper than one .lower() copy plus one substring scan per keyword
+AWS_KEYWORDS_RE = re.compile(r'amazon|aws', re.IGNORECASE)
+
+# Probability deltas of found keywords; scoring is then only a
+# lookup-and-sum over the set of found keywords
+AWS_PROB_TABLE = {
+    'amazon': 0.3,
+    'aws': 0.1
+}
+
+# Strong signals (fact key, needle) proving that the VM runs on AWS;
+# xen, kvm and nitro are covered by virt.host_type and the BIOS facts
+AWS_STRONG_SIGNALS = (
+    ('virt.host_type', 'aws'),
+    ('dmi.bios.version', 'amazon'),
+    ('dmi.bios.vendor', 'Amazon EC2')
+)
+
+
+class AWSCloudDetector(CloudDetector):
+    """
+    Detector of AWS cloud provider
+    """
+
+    __slots__ = ()
+
+    ID = 'aws'
+
+    def __init__(self, hw_info):
+        """
+        Initialize detector of AWS cloud provider
+        """
+        super(AWSCloudDetector, self).__init__(hw_info)
+
+    def is_vm(self):
+        """
+        Is system running on virtual machine or not
+        :return: True, when machine is running on VM; otherwise return False
+        """
+        return super(AWSCloudDetector, self).is_vm()
+
+    def is_running_on_cloud(self):
+        """
+        Try to detect AWS cloud provider using strong signals in
+        collected hardware information (output of dmidecode, virt-what, etc.)
+        :return: True, when detector detected AWS cloud provider; otherwise return False
+        """
+        # The system has to be VM
+        if self.is_vm() is False:
+            return False
+        # One .get() per fact and short-circuit on the first hit
+        return any(
+            needle in self.hw_info.get(key, '')
+            for key, needle in AWS_STRONG_SIGNALS
+        )
+
+    def is_likely_running_on_cloud(self):
+        """
+        Return non-zero value, when the machine is virtual machine and
+        some AWS keywords are found in hardware information
+        :return: Float value representing probability that the system runs on AWS
+        """
+        probability = 0.0
+
+        # When the machine is virtual machine, then there is higher probability
+        if self.is_vm() is True:
+            probability += 0.3
+
+        # Try to find "amazon" or "aws" keywords in the values of hardware information
+        found_keywords = self._search_keywords(AWS_KEYWORDS_RE)
+        probability += sum(AWS_PROB_TABLE[keyword] for keyword in found_keywords)
+
+        return probability
+
+
+class AWSCloudCollector(CloudCollector):
+    """
+    Collector of metadata and signature of EC2 instance from AWS
+    metadata server (IMDS)
+    """
+
+    __slots__ = ('_token', '_token_ctime', '_last_written_token', '_token_headers')
+
+    CLOUD_PROVIDER_ID = 'aws'
+
+    CLOUD_PROVIDER_HOST = '169.254.169.254'
+
+    CLOUD_PROVIDER_METADATA_PATH = '/latest/dynamic/instance-identity/document'
+
+    CLOUD_PROVIDER_METADATA_TYPE = 'application/json'
+
+    CLOUD_PROVIDER_SIGNATURE_PATH = '/latest/dynamic/instance-identity/signature'
+
+    CLOUD_PROVIDER_SIGNATURE_TYPE = 'text/plain'
+
+    # Path for requesting IMDSv2 session token
+    CLOUD_PROVIDER_TOKEN_PATH = '/latest/api/token'
+
+    # Time to live of IMDSv2 session token (seconds)
+    CLOUD_PROVIDER_TOKEN_TTL = 3600
+
+    # Headers of the token request never change, so the dictionary is
+    # built only once here and not with every request
+    TOKEN_REQUEST_HEADERS = {
+        'X-aws-ec2-metadata-token-ttl-seconds': str(CLOUD_PROVIDER_TOKEN_TTL)
+    }
+
+    METADATA_CACHE_FILE = '/var/lib/rhsm/cache/aws_metadata.json'
+
+    SIGNATURE_CACHE_FILE = '/var/lib/rhsm/cache/aws_signature.txt'
+
+    # Path to file, where IMDSv2 session token is cached as JSON
+    # document: {"token": ..., "ctime": ...}
+    TOKEN_CACHE_FILE = '/var/lib/rhsm/cache/aws_token.json'
+
+    def __init__(self):
+        """
+        Initialize collector of metadata of EC2 instance. Try to load
+        IMDSv2 session token cached by previous invocation.
+        """
+        super(AWSCloudCollector, self).__init__()
+        self._token = None
+        self._token_ctime = None
+        self._last_written_token = None
+        self._token_headers = None
+        self._get_token_from_cache_file()
+
+    def _is_cached_token_valid(self):
+        """
+        Is cached IMDSv2 session token still valid or not
+        :return: True, when cached token can still be used; otherwise return False
+        """
+        if self._token is None or self._token_ctime is None:
+            return False
+        return self._token_ctime + self.CLOUD_PROVIDER_TOKEN_TTL > time.time()
+
+    def _get_token_from_cache_file(self):
+        """
+        Try to load IMDSv2 session token from cache file. The token is
+        stored in the cache file together with time of its creation,
+        because the token is valid only for CLOUD_PROVIDER_TOKEN_TTL
+        seconds.
+        :return: String with token, when cache file contains valid token;
+            otherwise return None
+        """
+        if self.TOKEN_CACHE_FILE is None:
+            return None
+        try:
+            fd = os.open(self.TOKEN_CACHE_FILE, os.O_RDONLY)
+        except OSError as err:
+            log.debug("Unable to read token cache file %s: %s", self.TOKEN_CACHE_FILE, err)
+            return None
+        try:
+            # The whole small document is read with one read() syscall;
+            # opening directly (no exists() probe) also avoids the
+            # check-then-open race
+            content = os.read(fd, os.fstat(fd).st_size)
+        except OSError as err:
+            log.debug("Unable to read token cache file %s: %s", self.TOKEN_CACHE_FILE, err)
+            return None
+        finally:
+            os.close(fd)
+        try:
+            # json.loads accepts bytes, so no decode step is needed
+            cache = json.loads(content)
+        except ValueError as err:
+            log.debug("Unable to parse token cache file %s: %s", self.TOKEN_CACHE_FILE, err)
+            return None
+        if 'token' not in cache or 'ctime' not in cache:
+            log.debug("Token cache file %s does not contain token or ctime", self.TOKEN_CACHE_FILE)
+            return None
+        self._token = cache['token']
+        self._token_ctime = cache['ctime']
+        if self._is_cached_token_valid() is False:
+            log.debug("Cached token timed out")
+            self._token = None
+            self._token_ctime = None
+            return None
+        return self._token
+
+    def _write_token_to_cache_file(self):
+        """
+        Try to write IMDSv2 session token to cache file together with
+        time of its creation
+        """
+        if self.TOKEN_CACHE_FILE is None:
+            return
+        # Do not rewrite the cache file, when the token has not
+        # changed since the last write
+        if self._token == self._last_written_token:
+            return
+        cache = {
+            'token': self._token,
+            'ctime': self._token_ctime
+        }
+        self._write_cache_file(self.TOKEN_CACHE_FILE, json.dumps(cache))
+        self._last_written_token = self._token
+
+    def _get_token_from_server(self):
+        """
+        Try to get IMDSv2 session token from AWS metadata server and
+        cache it, because the token can be reused for several requests
+        during its time to live
+        :return: String with token, when it was possible to get it;
+            otherwise return None
+        """
+        # IMDSv2 requires PUT for the token endpoint (GET returns 405)
+        token = self._get_data_from_server(
+            self.CLOUD_PROVIDER_TOKEN_PATH,
+            headers=self.TOKEN_REQUEST_HEADERS,
+            method='PUT'
+        )
+        if token is not None:
+            self._token = token
+            self._token_ctime = time.time()
+            self._write_token_to_cache_file()
+        return token
+
+    def _get_token(self):
+        """
+        Try to get IMDSv2 session token (cached one or from the server)
+        :return: String with token, when it was possible to get it;
+            otherwise return None
+        """
+        if self._is_cached_token_valid() is True:
+            return self._token
+        # Another process could have refreshed the token in the cache
+        # file in the meantime; one read of the small file is cheaper
+        # than a new token request. Valid content is loaded into memory
+        # by _get_token_from_cache_file, so following calls do not
+        # touch the file at all.
+        token = self._get_token_from_cache_file()
+        if token is not None:
+            return token
+        return self._get_token_from_server()
+
+    def _get_data_from_server_imds_v1(self, path):
+        """
+        Try to get one document from AWS metadata server using IMDSv1
+        :return: String with body of HTTP response, when request was successful;
+            otherwise return None
+        """
+        return self._get_data_from_server(path)
+
+    def _get_data_from_server_imds_v2(self, path):
+        """
+        Try to get one document from AWS metadata server using IMDSv2
+        (session token has to be requested first)
+        :return: String with body of HTTP response, when request was successful;
+            otherwise return None
+        """
+        token = self._get_token()
+        if token is None:
+            return None
+        # The header dictionary is rebuilt only when the token has
+        # changed; metadata and signature requests issued with the
+        # same token share one dictionary
+        headers = self._token_headers
+        if headers is None or headers['X-aws-ec2-metadata-token'] != token:
+            headers = {
+                'X-aws-ec2-metadata-token': token
+            }
+            self._token_headers = headers
+        return self._get_data_from_server(path, headers=headers)
+
+    def _get_document_from_server(self, path, cache_file):
+        """
+        Try to get one document from AWS metadata server. IMDSv1 is
+        tried first and IMDSv2 is used as fallback, when IMDSv1 is
+        disabled on the EC2 instance. When no usable session token is
+        in memory yet, then the token request runs concurrently with
+        the IMDSv1 request; on instances with only IMDSv2 enabled the
+        fallback then does not pay the token round-trip on top of the
+        failed IMDSv1 request. Successful response is written to cache file.
+        :param path: path of requested document on the metadata server
+        :param cache_file: path to file, where the document is cached
+        :return: String with the document, when it was possible to get it;
+            otherwise return None
+        """
+        if self._is_cached_token_valid() is True or ThreadPoolExecutor is None:
+            # Token is already in memory (or this Python has no
+            # concurrent.futures); no thread is spawned
+            document = self._get_data_from_server_imds_v1(path)
+            if document is None:
+                document = self._get_data_from_server_imds_v2(path)
+        else:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                token_future = executor.submit(self._get_token)
+                document = self._get_data_from_server_imds_v1(path)
+                if document is None:
+                    # Token response very likely already arrived, when
+                    # the IMDSv1 request has failed
+                    token_future.result()
+                    document = self._get_data_from_server_imds_v2(path)
+        if document is not None:
+            self._write_cache_file(cache_file, document)
+        return document
+
+    def _get_metadata_from_server(self):
+        """
+        Try to get metadata from AWS metadata server using IMDSv1 or
+        IMDSv2. Successful response is written to cache file.
+        :return: String with metadata, when it was possible to get them;
+            otherwise return None
+        """
+        return self._get_document_from_server(
+            self.CLOUD_PROVIDER_METADATA_PATH,
+            self.METADATA_CACHE_FILE
+        )
+
+    def collect_all(self):
+        """
+        Try to collect metadata and signature of EC2 instance. When
+        cache files are cold, then the IMDSv2 session token request and
+        both IMDSv1 requests are issued concurrently, because the
+        token is not needed for IMDSv1 and waiting for every response
+        in sequence would pay one round-trip per request.
+        :return: Tuple (metadata, signature); any item can be None,
+            when it was not possible to get the document
+        """
+        metadata = self._get_memoized_metadata()
+        if metadata is None:
+            metadata = self._get_metadata_from_cache()
+        signature = self._get_memoized_signature()
+        if signature is None:
+            signature = self._get_signature_from_cache_file()
+        if metadata is not None and signature is not None:
+            self._memoize_metadata(metadata)
+            self._memoize_signature(signature)
+            return metadata, signature
+
+        # Remember which documents were served from memory or cache
+        # file; only freshly fetched documents are written back below,
+        # so the mtime (and thus the TTL) of untouched cache files is
+        # not extended
+        metadata_was_cached = metadata is not None
+        signature_was_cached = signature is not None
+
+        if ThreadPoolExecutor is None:
+            # This Python has no concurrent.futures; get the missing
+            # documents in sequence
+            if metadata is None:
+                metadata = self._get_data_from_server_imds_v1(self.CLOUD_PROVIDER_METADATA_PATH)
+                if metadata is None:
+                    metadata = self._get_data_from_server_imds_v2(self.CLOUD_PROVIDER_METADATA_PATH)
+            if signature is None:
+                signature = self._get_data_from_server_imds_v1(self.CLOUD_PROVIDER_SIGNATURE_PATH)
+                if signature is None:
+                    signature = self._get_data_from_server_imds_v2(self.CLOUD_PROVIDER_SIGNATURE_PATH)
+        else:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                token_future = None
+                if self._is_cached_token_valid() is False:
+                    token_future = executor.submit(self._get_token)
+                metadata_future = None
+                signature_future = None
+                if metadata is None:
+                    metadata_future = executor.submit(
+                        self._get_data_from_server_imds_v1,
+                        self.CLOUD_PROVIDER_METADATA_PATH
+                    )
+                if signature is None:
+                    signature_future = executor.submit(
+                        self._get_data_from_server_imds_v1,
+                        self.CLOUD_PROVIDER_SIGNATURE_PATH
+                    )
+                if metadata_future is not None:
+                    metadata = metadata_future.result()
+                if signature_future is not None:
+                    signature = signature_future.result()
+
+                # When IMDSv1 is disabled on the EC2 instance, then try
+                # to get missing documents using IMDSv2 (the token
+                # request was already running in parallel with the
+                # IMDSv1 requests)
+                if metadata is None or signature is None:
+                    if token_future is not None:
+                        token_future.result()
+                    if metadata is None:
+                        metadata = self._get_data_from_server_imds_v2(self.CLOUD_PROVIDER_METADATA_PATH)
+                    if signature is None:
+                        signature = self._get_data_from_server_imds_v2(self.CLOUD_PROVIDER_SIGNATURE_PATH)
+
+        if metadata is not None:
+            if metadata_was_cached is False:
+                self._write_cache_file(self.METADATA_CACHE_FILE, metadata)
+            self._memoize_metadata(metadata)
+        if signature is not None:
+            if signature_was_cached is False:
+                self._write_cache_file(self.SIGNATURE_CACHE_FILE, signature)
+            self._memoize_signature(signature)
+
+        return metadata, signature
+
+    def _get_signature_from_server(self):
+        """
+        Try to get signature of metadata from AWS metadata server using
+        IMDSv1 or IMDSv2. Successful response is written to cache file.
+        :return: String with signature, when it was possible to get it;
+            otherwise return None
+        """
+        return self._get_document_from_server(
+            self.CLOUD_PROVIDER_SIGNATURE_PATH,
+            self.SIGNATURE_CACHE_FILE
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_aws_cloud_collector():
+    """
+    Return collector of AWS metadata shared within the process, so
+    every subcommand asking for the metadata reuses already collected
+    documents
+    :return: Instance of AWSCloudCollector
+    """
+    return AWSCloudCollector()
+
+
+# Some temporary smoke testing code. You can test this module using:
+# sudo PYTHONPATH=./src python3 -m rhsmlib.cloud.providers.aws
+if __name__ == '__main__':
+    from rhsmlib.cloud.providers import _smoke
+    _smoke.run(AWSCloudDetector, AWSCloudCollector)
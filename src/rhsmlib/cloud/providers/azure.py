@@ -0,0 +1,101 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Detector of the Azure cloud provider. It tries to find out if the
+system runs on Azure public cloud.
+"""
+
+import logging
+import re
+
+from rhsmlib.cloud.detector import CloudDetector
+
+log = logging.getLogger(__name__)
+
+# Compiled only once; all keywords are matched in a single pass over
+# every hardware item
+AZURE_KEYWORDS_RE = re.compile(r'microsoft|azure', re.IGNORECASE)
+
+# Probability deltas of found keywords; scoring is then only a
+# lookup-and-sum over the set of found keywords
+AZURE_PROB_TABLE = {
+    'microsoft': 0.3,
+    'azure': 0.1
+}
+
+
+class AzureCloudDetector(CloudDetector):
+    """
+    Detector of Azure cloud provider
+    """
+
+    __slots__ = ()
+
+    ID = 'azure'
+
+    def __init__(self, hw_info):
+        """
+        Initialize detector of Azure cloud provider
+        """
+        super(AzureCloudDetector, self).__init__(hw_info)
+
+    def is_vm(self):
+        """
+        Is system running on virtual machine or not
+        :return: True, when machine is running on VM; otherwise return False
+        """
+        return super(AzureCloudDetector, self).is_vm()
+
+    def is_running_on_cloud(self):
+        """
+        Try to detect Azure cloud provider using strong signals in
+        collected hardware information (output of dmidecode, virt-what, etc.)
+        :return: True, when detector detected Azure cloud provider; otherwise return False
+        """
+        # The system has to be VM
+        if self.is_vm() is False:
+            return False
+        # This asset tag is used by Azure for virtual machines
+        # See: https://docs.microsoft.com/en-us/azure/virtual-machines/linux/instance-metadata-service
+        # Only one dict lookup; membership test and value fetch would
+        # look the key up twice
+        return self.hw_info.get('dmi.chassis.asset_tag') == '7783-7084-3265-9085-8269-3286-77'
+
+    def is_likely_running_on_cloud(self):
+        """
+        Return non-zero value, when the machine is virtual machine and
+        some Azure keywords are found in hardware information
+        :return: Float value representing probability that the system runs on Azure
+        """
+        probability = 0.0
+
+        # When the machine is virtual machine, then there is higher probability
+        if self.is_vm() is True:
+            probability += 0.3
+
+        # Try to find "microsoft" or "azure" keywords in the values of hardware information
+        found_keywords = self._search_keywords(AZURE_KEYWORDS_RE)
+        probability += sum(AZURE_PROB_TABLE[keyword] for keyword in found_keywords)
+
+        return probability
+
+
+# Some temporary smoke testing code. You can test this module using:
+# sudo PYTHONPATH=./src python3 -m rhsmlib.cloud.providers.azure
+if __name__ == '__main__':
+    from rhsmlib.cloud.providers import _smoke
+    _smoke.run(AzureCloudDetector)
@@ -0,0 +1,104 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Detector of the GCP (Google Cloud Platform) cloud provider. It tries
+to find out if the system runs on GCP public cloud.
+"""
+
+import logging
+import re
+
+from rhsmlib.cloud.detector import CloudDetector
+
+log = logging.getLogger(__name__)
+
+# Compiled only once; all keywords are matched in a single pass over
+# every hardware item
+GCP_KEYWORDS_RE = re.compile(r'google|gcp', re.IGNORECASE)
+
+# Probability deltas of found keywords; scoring is then only a
+# lookup-and-sum over the set of found keywords
+GCP_PROB_TABLE = {
+    'google': 0.3,
+    'gcp': 0.1
+}
+
+
+class GCPCloudDetector(CloudDetector):
+    """
+    Detector of GCP cloud provider
+    """
+
+    __slots__ = ()
+
+    ID = 'gcp'
+
+    def __init__(self, hw_info):
+        """
+        Initialize detector of GCP cloud provider
+        """
+        super(GCPCloudDetector, self).__init__(hw_info)
+
+    def is_vm(self):
+        """
+        Is system running on virtual machine or not
+        :return: True, when machine is running on VM; otherwise return False
+        """
+        return super(GCPCloudDetector, self).is_vm()
+
+    def is_running_on_cloud(self):
+        """
+        Try to detect GCP cloud provider using strong signals in
+        collected hardware information (output of dmidecode, virt-what, etc.)
+        :return: True, when detector detected GCP cloud provider; otherwise return False
+        """
+        # The system has to be VM
+        if self.is_vm() is False:
+            return False
+        # Google uses own BIOS on GCP virtual machines. Every fact is
+        # looked up only once; membership test and value fetch would
+        # look the key up twice
+        if 'Google' in self.hw_info.get('dmi.bios.version', ''):
+            return True
+        if 'Google' in self.hw_info.get('dmi.bios.vendor', ''):
+            return True
+        return False
+
+    def is_likely_running_on_cloud(self):
+        """
+        Return non-zero value, when the machine is virtual machine and
+        some GCP keywords are found in hardware information
+        :return: Float value representing probability that the system runs on GCP
+        """
+        probability = 0.0
+
+        # When the machine is virtual machine, then there is higher probability
+        if self.is_vm() is True:
+            probability += 0.3
+
+        # Try to find "google" or "gcp" keywords in the values of hardware information
+        found_keywords = self._search_keywords(GCP_KEYWORDS_RE)
+        probability += sum(GCP_PROB_TABLE[keyword] for keyword in found_keywords)
+
+        return probability
+
+
+# Some temporary smoke testing code. You can test this module using:
+# sudo PYTHONPATH=./src python3 -m rhsmlib.cloud.providers.gcp
+if __name__ == '__main__':
+    from rhsmlib.cloud.providers import _smoke
+    _smoke.run(GCPCloudDetector)
@@ -0,0 +1,82 @@
+from __future__ import print_function, division, absolute_import
+
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+"""
+Utilities for detection of cloud provider
+"""
+
+import logging
+
+from rhsmlib.cloud.providers.aws import AWSCloudDetector
+from rhsmlib.cloud.providers.azure import AzureCloudDetector
+from rhsmlib.cloud.providers.gcp import GCPCloudDetector
+
+log = logging.getLogger(__name__)
+
+
+def detect_cloud_provider():
+    """
+    This method tries to detect cloud provider using hardware
+    information provided by rhsmlib.facts
+    :return: List of string representing detected cloud providers.
+        E.g. ['aws'], when it is AWS cloud provider. The list is sorted
+        according to detected probability, when only heuristics
+        detection was successful.
+    """
+    # The facts collectors are imported lazily, because they drag in
+    # the whole facts machinery, which is not needed by callers that
+    # only import this module
+    from rhsmlib.facts.host_collector import HostCollector
+    from rhsmlib.facts.hwprobe import HardwareCollector
+
+    # First try to collect only host information (output of virt-what, etc.)
+    host_collector = HostCollector()
+    host_facts = host_collector.get_all()
+    cloud_detectors = [
+        AWSCloudDetector(host_facts),
+        AzureCloudDetector(host_facts),
+        GCPCloudDetector(host_facts)
+    ]
+
+    cloud_list = []
+    for cloud_detector in cloud_detectors:
+        if cloud_detector.is_running_on_cloud() is True:
+            cloud_list.append(cloud_detector.ID)
+
+    # When no cloud provider was detected using strong signals, then
+    # try to collect more hardware information (output of dmidecode)
+    # and use heuristics detection
+    if len(cloud_list) == 0:
+        log.debug('No cloud provider detected using strong signals. Trying heuristics detection...')
+        hardware_collector = HardwareCollector()
+        hw_facts = hardware_collector.get_all()
+        facts = {}
+        facts.update(host_facts)
+        facts.update(hw_facts)
+        cloud_detectors = [
+            AWSCloudDetector(facts),
+            AzureCloudDetector(facts),
+            GCPCloudDetector(facts)
+        ]
+        probed_cloud_list = []
+        for cloud_detector in cloud_detectors:
+            probability = cloud_detector.is_likely_running_on_cloud()
+            if probability > 0.0:
+                probed_cloud_list.append((probability, cloud_detector.ID))
+        probed_cloud_list.sort(reverse=True)
+        cloud_list = [cloud_id for _, cloud_id in probed_cloud_list]
+
+    return cloud_list
@@ -0,0 +1,721 @@
+from __future__ import print_function, division, absolute_import
+
+#
+# Copyright (c) 2020 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+from mock import patch, Mock
+
+from rhsmlib.cloud.providers import aws
+from rhsmlib.cloud.providers import azure
+from rhsmlib.cloud.providers import gcp
+from rhsmlib.cloud import utils
+
+
+# Test cases of detectors of one cloud provider. Every case is
+# tuple: (case id, facts, expected result of is_vm(), expected result
+# of is_running_on_cloud())
+AWS_DETECTOR_CASES = (
+    (
+        'not_vm',
+        {
+            'virt.is_guest': False,
+            'dmi.bios.version': 'cool hardware company'
+        },
+        False,
+        False
+    ),
+    (
+        'vm_using_xen',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'xen',
+            'dmi.bios.version': '4.2.amazon'
+        },
+        True,
+        True
+    ),
+    (
+        'vm_using_kvm',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Amazon EC2'
+        },
+        True,
+        True
+    ),
+    (
+        'vm_not_on_aws',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Foo'
+        },
+        True,
+        False
+    ),
+    (
+        'vm_without_dmi_bios_info',
+        {},
+        False,
+        False
+    )
+)
+
+# Test cases of heuristics detection. Every case is tuple: (case id,
+# facts, True when non-zero probability is expected)
+AWS_HEURISTICS_CASES = (
+    (
+        'vm_is_likely_on_aws',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.serial': '0xec2aaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa'
+        },
+        True
+    ),
+    (
+        'vm_is_not_likely_on_aws',
+        {
+            'virt.is_guest': False,
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Foo'
+        },
+        False
+    )
+)
+
+AZURE_DETECTOR_CASES = (
+    (
+        'not_vm',
+        {
+            'virt.is_guest': False,
+            'dmi.bios.version': 'cool hardware company'
+        },
+        False,
+        False
+    ),
+    (
+        'vm_on_azure',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.version': '1.0',
+            'dmi.chassis.asset_tag': '7783-7084-3265-9085-8269-3286-77'
+        },
+        True,
+        True
+    ),
+    (
+        'vm_not_on_azure',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.version': '1.0',
+            'dmi.chassis.asset_tag': '1234-5678-9012-3456-7890-1234-56'
+        },
+        True,
+        False
+    )
+)
+
+AZURE_HEURISTICS_CASES = (
+    (
+        'vm_is_likely_on_azure',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Microsoft Corporation'
+        },
+        True
+    ),
+)
+
+GCP_DETECTOR_CASES = (
+    (
+        'not_vm',
+        {
+            'virt.is_guest': False,
+            'dmi.bios.version': 'cool hardware company'
+        },
+        False,
+        False
+    ),
+    (
+        'vm_on_gcp',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.version': 'Google',
+            'dmi.bios.vendor': 'Google'
+        },
+        True,
+        True
+    ),
+    (
+        'vm_not_on_gcp',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Foo'
+        },
+        True,
+        False
+    )
+)
+
+GCP_HEURISTICS_CASES = (
+    (
+        'vm_is_likely_on_gcp',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.version': '1.0',
+            'dmi.bios.vendor': 'Google'
+        },
+        True
+    ),
+)
+
+
+# Test cases of detect_cloud_provider(). Every case is tuple:
+# (case id, host facts, hardware facts, expected list of detected
+# cloud providers, True when the whole list has to match exactly)
+CLOUD_PROVIDER_CASES = (
+    (
+        'aws',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.vendor': 'Amazon EC2'
+        },
+        {},
+        ['aws'],
+        True
+    ),
+    (
+        'aws_heuristics',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.vendor': 'AWS',
+            'dmi.bios.version': '1.0'
+        },
+        {
+            'dmi.system.manufacturer': 'Amazon'
+        },
+        ['aws'],
+        False
+    ),
+    (
+        'gcp',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.vendor': 'Google',
+            'dmi.bios.version': 'Google'
+        },
+        {},
+        ['gcp'],
+        True
+    ),
+    (
+        'gcp_heuristics',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.vendor': 'Foo Company',
+            'dmi.bios.version': '1.0'
+        },
+        {
+            'dmi.system.manufacturer': 'Google'
+        },
+        ['gcp'],
+        False
+    ),
+    (
+        'azure',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.vendor': 'Foo company',
+            'dmi.chassis.asset_tag': '7783-7084-3265-9085-8269-3286-77'
+        },
+        {},
+        ['azure'],
+        True
+    ),
+    (
+        'azure_heuristics',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'hyperv',
+            'dmi.bios.vendor': 'Microsoft',
+            'dmi.bios.version': '1.0'
+        },
+        {
+            'dmi.system.manufacturer': 'Microsoft'
+        },
+        ['azure'],
+        False
+    ),
+    (
+        'conflict_in_strong_signals',
+        {
+            'virt.is_guest': True,
+            'virt.host_type': 'kvm',
+            'dmi.bios.vendor': 'Google',
+            'dmi.bios.version': 'Google',
+            'dmi.chassis.asset_tag': '7783-7084-3265-9085-8269-3286-77'
+        },
+        {},
+        ['azure', 'gcp'],
+        True
+    )
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cloud_detector(detector_cls, facts_items):
+    """
+    Construction of detector is memoized, because several cases in the
+    tables share the same facts (e.g. the not_vm case) and detectors
+    never mutate given facts
+    :param detector_cls: class of detector of one cloud provider
+    :param facts_items: facts as hashable tuple of sorted items
+    :return: instance of the detector
+    """
+    return detector_cls(dict(facts_items))
+
+
+class CloudDetectorTestMixin(object):
+    """
+    Mixin running table-driven test cases of one cloud provider
+    detector. Subclass has to set DETECTOR_CLS, DETECTOR_CASES and
+    HEURISTICS_CASES.
+    """
+
+    DETECTOR_CLS = None
+    DETECTOR_CASES = ()
+    HEURISTICS_CASES = ()
+
+    def test_is_running_on_cloud(self):
+        """
+        Test detection of VM and of the cloud provider using strong
+        signals for every case in the table
+        """
+        for case_id, facts, expected_vm, expected_cloud in self.DETECTOR_CASES:
+            with self.subTest(case=case_id):
+                cloud_detector = _get_cloud_detector(self.DETECTOR_CLS, tuple(sorted(facts.items())))
+                self.assertEqual(cloud_detector.is_vm(), expected_vm)
+                self.assertEqual(cloud_detector.is_running_on_cloud(), expected_cloud)
+
+    def test_is_likely_running_on_cloud(self):
+        """
+        Test heuristics detection of the cloud provider for every case
+        in the table
+        """
+        for case_id, facts, expected_nonzero in self.HEURISTICS_CASES:
+            with self.subTest(case=case_id):
+                cloud_detector = _get_cloud_detector(self.DETECTOR_CLS, tuple(sorted(facts.items())))
+                probability = cloud_detector.is_likely_running_on_cloud()
+                if expected_nonzero is True:
+                    self.assertGreater(probability, 0.0)
+                else:
+                    self.assertEqual(probability, 0.0)
+
+
+class TestAWSDetector(CloudDetectorTestMixin, unittest.TestCase):
+    """
+    Class used for testing detector of AWS cloud provider
+    """
+
+    DETECTOR_CLS = aws.AWSCloudDetector
+    DETECTOR_CASES = AWS_DETECTOR_CASES
+    HEURISTICS_CASES = AWS_HEURISTICS_CASES
+
+
+class TestAzureDetector(CloudDetectorTestMixin, unittest.TestCase):
+    """
+    Class used for testing detector of Azure cloud provider
+    """
+
+    DETECTOR_CLS = azure.AzureCloudDetector
+    DETECTOR_CASES = AZURE_DETECTOR_CASES
+    HEURISTICS_CASES = AZURE_HEURISTICS_CASES
+
+
+class TestGCPDetector(CloudDetectorTestMixin, unittest.TestCase):
+    """
+    Class used for testing detector of GCP cloud provider
+    """
+
+    DETECTOR_CLS = gcp.GCPCloudDetector
+    DETECTOR_CASES = GCP_DETECTOR_CASES
+    HEURISTICS_CASES = GCP_HEURISTICS_CASES
+
+
+class TestCloudUtils(unittest.TestCase):
+    """
+    Class used for testing detect_cloud_provider() function
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Patch the facts collectors only once for the whole class;
+        starting and stopping a patcher walks module dictionaries and
+        doing that for every test method is needlessly expensive
+        """
+        cls.host_collector_patcher = patch('rhsmlib.facts.host_collector.HostCollector')
+        cls.host_collector_mock = cls.host_collector_patcher.start()
+        cls.hardware_collector_patcher = patch('rhsmlib.facts.hwprobe.HardwareCollector')
+        cls.hardware_collector_mock = cls.hardware_collector_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop patching of the facts collectors
+        """
+        cls.host_collector_patcher.stop()
+        cls.hardware_collector_patcher.stop()
+
+    def setUp(self):
+        """
+        Give every test fresh collector instances, so return values
+        and call counts do not leak between tests
+        """
+        self.host_fact_collector_instance = Mock()
+        self.host_collector_mock.return_value = self.host_fact_collector_instance
+        self.hw_fact_collector_instance = Mock()
+        self.hardware_collector_mock.return_value = self.hw_fact_collector_instance
+
+    def test_detect_cloud_provider(self):
+        """
+        Test detection of cloud provider for every case in the table.
+        Cases with exact=True check the whole detected list (strong
+        signals); cases with exact=False check only the most probable
+        candidate (heuristics detection)
+        """
+        for case_id, host_facts, hw_facts, expected, exact in CLOUD_PROVIDER_CASES:
+            with self.subTest(case=case_id):
+                self.host_fact_collector_instance.get_all.return_value = host_facts
+                self.hw_fact_collector_instance.get_all.return_value = hw_facts
+                detected_clouds = utils.detect_cloud_provider()
+                if exact is True:
+                    self.assertEqual(detected_clouds, expected)
+                else:
+                    self.assertEqual(detected_clouds[0], expected[0])
+
+
+# Metadata and IMDSv2 session token documents returned by the mocked
+# AWS metadata server
+AWS_METADATA = """
+        {
+            "accountId": "012345678900",
+            "architecture": "x86_64",
+            "availabilityZone": "eu-central-1b",
+            "imageId": "ami-0123456789abcdeff",
+            "instanceId": "i-abcdef01234567890",
+            "instanceType": "m5.large",
+            "region": "eu-central-1"
+        }
+        """
+
+AWS_TOKEN = 'EXAMPLEQi1wM0WZUTEYTJFOUZPNFNFpDRTdLOUdNRlBXUk5IMjI0RjpBS0xBNVVLTVBSTlhHWEhYWFhYWA=='
+
+# The documents are encoded to bytes only once here; mocked responses
+# in all tests share these constants instead of re-encoding the
+# strings per test
+AWS_METADATA_BYTES = AWS_METADATA.encode('utf-8')
+AWS_TOKEN_BYTES = AWS_TOKEN.encode('utf-8')
+
+
+class _FakeResponse(object):
+    """
+    Lightweight stub of HTTP response of the metadata server. The
+    collector only reads .status and calls .read(); a full Mock with
+    its call-tracking machinery is needlessly expensive here and no
+    test asserts on the response object itself.
+    """
+
+    __slots__ = ('status', '_body')
+
+    def __init__(self, status, body):
+        self.status = status
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+def _build_response(status, body):
+    """
+    Build one stubbed HTTP response of the metadata server
+    :param status: HTTP status of the response
+    :param body: bytes with body of the response
+    :return: instance of _FakeResponse
+    """
+    return _FakeResponse(status, body)
+
+
+# Responses of the mocked metadata server supporting only IMDSv2 are
+# built only once here; the request callback then just picks one of
+# them instead of building new Mock() for every request
+IMDS_V2_TOKEN_RESPONSE = _build_response(200, AWS_TOKEN_BYTES)
+IMDS_V2_METADATA_RESPONSE = _build_response(200, AWS_METADATA_BYTES)
+IMDS_V2_METHOD_NOT_ALLOWED_RESPONSE = _build_response(405, b'')
+IMDS_V2_UNAUTHORIZED_RESPONSE = _build_response(401, b'')
+
+# Dispatch table of the mocked IMDSv2-only server; the key is tuple
+# (requested path is the token endpoint, request is authorized). For
+# the token endpoint "authorized" means the PUT method was used, for
+# other documents it means a valid session token header was sent.
+IMDS_V2_RESPONSE_TABLE = {
+    (True, True): IMDS_V2_TOKEN_RESPONSE,
+    (True, False): IMDS_V2_METHOD_NOT_ALLOWED_RESPONSE,
+    (False, True): IMDS_V2_METADATA_RESPONSE,
+    (False, False): IMDS_V2_UNAUTHORIZED_RESPONSE
+}
+
+
+class TestAWSCollector(unittest.TestCase):
+    """
+    Class used for testing collector of AWS metadata
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Do not read/write real cache files during testing. The cache
+        file constants are patched with plain None once for the whole
+        class; they hold no state, so per-test patching would only pay
+        the patch.start/stop cost several times for nothing.
+        """
+        cls.cache_file_patchers = [
+            patch.object(aws.AWSCloudCollector, 'METADATA_CACHE_FILE', None),
+            patch.object(aws.AWSCloudCollector, 'SIGNATURE_CACHE_FILE', None),
+            patch.object(aws.AWSCloudCollector, 'TOKEN_CACHE_FILE', None)
+        ]
+        for cache_file_patcher in cls.cache_file_patchers:
+            cache_file_patcher.start()
+        # Communication with the metadata server is patched only once
+        # for the whole class too; tests get isolation by resetting
+        # the mock in setUp
+        cls.httplib_conn_patcher = patch('rhsmlib.cloud.collector.httplib.HTTPConnection')
+        cls.http_connection_mock = cls.httplib_conn_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop patching of communication and of the cache file constants
+        """
+        cls.httplib_conn_patcher.stop()
+        for cache_file_patcher in cls.cache_file_patchers:
+            cache_file_patcher.stop()
+
+    def setUp(self):
+        """
+        Reset the mocked connection, so responses configured by one
+        test and requests recorded by it do not leak to other tests
+        """
+        self.http_connection_mock.reset_mock(return_value=True, side_effect=True)
+        self.connection = self.http_connection_mock.return_value
+
+    def test_get_metadata_from_server_imds_v1(self):
+        """
+        Test the case, when metadata are gathered from server using IMDSv1
+        """
+        self.connection.getresponse.return_value = _build_response(200, AWS_METADATA_BYTES)
+
+        aws_collector = aws.AWSCloudCollector()
+        metadata = aws_collector.get_metadata()
+        self.assertEqual(metadata, AWS_METADATA)
+
+    def get_only_imds_v2_is_supported(self, method, path, headers=None):
+        """
+        Mock callback of conn.request() simulating the metadata server,
+        where only IMDSv2 is supported (IMDSv1 requests get 401)
+        """
+        is_token_path = (path == aws.AWSCloudCollector.CLOUD_PROVIDER_TOKEN_PATH)
+        if is_token_path:
+            # IMDSv2 token endpoint accepts only PUT method
+            authorized = (method == 'PUT')
+        else:
+            authorized = headers is not None and \
+                headers.get('X-aws-ec2-metadata-token') == AWS_TOKEN
+        response = IMDS_V2_RESPONSE_TABLE[(is_token_path, authorized)]
+        # The response is paired with the request per thread, because
+        # the collector can request the token and documents from more
+        # threads at once
+        self.requested_responses.response = response
+
+    def test_get_metadata_from_server_imds_v2(self):
+        """
+        Test the case, when metadata are gathered from server using IMDSv2
+        """
+        self.requested_responses = threading.local()
+        self.connection.request.side_effect = self.get_only_imds_v2_is_supported
+        self.connection.getresponse.side_effect = lambda: self.requested_responses.response
+
+        aws_collector = aws.AWSCloudCollector()
+        metadata = aws_collector.get_metadata()
+        self.assertIsNotNone(metadata)
+        self.assertIn('"instanceId": "i-abcdef01234567890"', metadata)
+
+    def test_get_signature_from_server(self):
+        """
+        Test the case, when signature of metadata is gathered from server
+        """
+        aws_signature = """ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789ABCDE
+EXAMPLEsYQkhPnDaRqq89VKyYsu9NPaPGxf3fO4cDCmqHUIE8sBCDEFw6TaNoW10BKfAwPpBcshUd2WhVTLaBGXDF
+EXAMPLE5W3vdNAFWUPg3PQQLIPyBHIBSl5o8f+vxk3OFxbc37PdH6oBBFVSu3HfjI4NiGyqllIU5+0="""
+        self.connection.getresponse.return_value = _build_response(200, aws_signature.encode('utf-8'))
+
+        aws_collector = aws.AWSCloudCollector()
+        signature = aws_collector.get_signature()
+        self.assertEqual(signature, aws_signature)
+
+    def test_collect_all_imds_v1(self):
+        """
+        Test the case, when metadata and signature are collected
+        together from server supporting IMDSv1
+        """
+        aws_document = '{"instanceId": "i-abcdef01234567890"}'
+        self.connection.getresponse.return_value = _build_response(200, aws_document.encode('utf-8'))
+
+        aws_collector = aws.AWSCloudCollector()
+        metadata, signature = aws_collector.collect_all()
+        self.assertEqual(metadata, aws_document)
+        self.assertEqual(signature, aws_document)
+
+    def test_get_metadata_memoized(self):
+        """
+        Test that repeated call of get_metadata() within one process
+        does not do any other HTTP request
+        """
+        aws_metadata = '{"instanceId": "i-abcdef01234567890"}'
+        self.connection.getresponse.return_value = _build_response(200, aws_metadata.encode('utf-8'))
+
+        aws_collector = aws.AWSCloudCollector()
+        metadata = aws_collector.get_metadata()
+        self.assertEqual(metadata, aws_metadata)
+        request_count = self.connection.request.call_count
+        other_metadata = aws_collector.get_metadata()
+        self.assertEqual(other_metadata, metadata)
+        self.assertEqual(self.connection.request.call_count, request_count)
+
+    def test_get_metadata_dict(self):
+        """
+        Test that metadata are parsed to dictionary only once and
+        following calls return memoized dictionary
+        """
+        aws_metadata = '{"instanceId": "i-abcdef01234567890", "region": "eu-central-1"}'
+        self.connection.getresponse.return_value = _build_response(200, aws_metadata.encode('utf-8'))
+
+        aws_collector = aws.AWSCloudCollector()
+        metadata_dict = aws_collector.get_metadata_dict()
+        self.assertEqual(metadata_dict['instanceId'], 'i-abcdef01234567890')
+        request_count = self.connection.request.call_count
+        # Second call has to return memoized dictionary without
+        # any other HTTP request
+        other_metadata_dict = aws_collector.get_metadata_dict()
+        self.assertIs(other_metadata_dict, metadata_dict)
+        self.assertEqual(self.connection.request.call_count, request_count)
+
+    def test_get_token_from_server(self):
+        """
+        Test that IMDSv2 session token is requested using PUT method
+        """
+        self.connection.getresponse.return_value = _build_response(200, AWS_TOKEN_BYTES)
+
+        aws_collector = aws.AWSCloudCollector()
+        token = aws_collector._get_token_from_server()
+        self.assertEqual(token, AWS_TOKEN)
+        method = self.connection.request.call_args[0][0]
+        self.assertEqual(method, 'PUT')
+
+    def test_get_token_from_server_wrong_method(self):
+        """
+        Test the case, when token endpoint refuses the request
+        (e.g. 405 Method Not Allowed)
+        """
+        self.connection.getresponse.return_value = _build_response(405, b'')
+
+        aws_collector = aws.AWSCloudCollector()
+        token = aws_collector._get_token_from_server()
+        self.assertIsNone(token)
+
+    def _write_token_cache_file(self, cache):
+        """
+        Write given token cache document to temporary file and return
+        its path (the file is deleted automatically after the test)
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(cache, f)
+            cache_path = f.name
+        self.addCleanup(os.unlink, cache_path)
+        return cache_path
+
+    def test_get_token_from_cache_file(self):
+        """
+        Test that valid token is loaded from cache file during
+        initialization of collector
+        """
+        cache_path = self._write_token_cache_file({'token': 'XXXXXXXX', 'ctime': time.time()})
+        with patch.object(aws.AWSCloudCollector, 'TOKEN_CACHE_FILE', cache_path):
+            aws_collector = aws.AWSCloudCollector()
+            self.assertEqual(aws_collector._token, 'XXXXXXXX')
+
+    def test_get_token_from_cache_file_timed_out(self):
+        """
+        Test that timed out token is not loaded from cache file
+        """
+        old_ctime = time.time() - aws.AWSCloudCollector.CLOUD_PROVIDER_TOKEN_TTL - 10
+        cache_path = self._write_token_cache_file({'token': 'XXXXXXXX', 'ctime': old_ctime})
+        with patch.object(aws.AWSCloudCollector, 'TOKEN_CACHE_FILE', cache_path):
+            aws_collector = aws.AWSCloudCollector()
+            self.assertIsNone(aws_collector._token)
+
+    def test_is_cached_token_valid(self):
+        """
+        Test that validity of in-memory cached token is evaluated correctly
+        """
+        aws_collector = aws.AWSCloudCollector()
+        # No token loaded
+        self.assertFalse(aws_collector._is_cached_token_valid())
+        # Fresh token
+        aws_collector._token = 'XXXXXXXX'
+        aws_collector._token_ctime = time.time()
+        self.assertTrue(aws_collector._is_cached_token_valid())
+        # Token older than TTL
+        aws_collector._token_ctime = time.time() - aws.AWSCloudCollector.CLOUD_PROVIDER_TOKEN_TTL - 10
+        self.assertFalse(aws_collector._is_cached_token_valid())